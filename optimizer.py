@@ -1,15 +1,105 @@
 from __future__ import annotations
  
+import os
 import re
+import sys
 import json
-import uuid
+import heapq
+import functools
+from collections import Counter, OrderedDict
 from datetime import datetime
 from typing import Any
  
 from strands import Agent
 from strands.tools import tool as strands_tool
- 
- 
+
+try:
+    # Optional: Rust/SIMD JSON parser, ~2-3× faster than stdlib. Its
+    # JSONDecodeError subclasses json.JSONDecodeError, so error handling
+    # below works with either.
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+try:
+    # Optional: array-based top-k selection in search(). Everything works
+    # without it.
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    # Optional fast path: only worth it when many MCP servers are attached
+    # (hundreds to thousands of tools). Needs numpy as well.
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+# Translation table mapping every non-word ASCII char to a space, so
+# tokenization is a single C-level translate + split instead of running
+# the regex engine for the trivial \w+ pattern. Non-ASCII text (rare in
+# tool names/descriptions) passes through and splits on whitespace.
+_NONWORD = str.maketrans({
+    c: " " for c in map(chr, range(128)) if not (c.isalnum() or c == "_")
+})
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_args(s: str) -> Any:
+    """Parse a small JSON argument string, memoized for agent retry loops."""
+    return _loads(s)
+
+
+def _tokenize(text: str) -> list[str]:
+    # Tokens like "get"/"jira"/"issue" recur across entries and queries;
+    # interning dedupes the str objects and lets set intersection take the
+    # pointer-identity fast path.
+    return [sys.intern(t) for t in text.lower().translate(_NONWORD).split()]
+
+# Below this many tools the pure-Python scorer wins; JIT dispatch overhead
+# and array setup only pay off on large registries.
+_NUMBA_MIN_DOCS = 512
+
+# Naming heuristic for read-only tools whose results are safe to cache
+# within a session (plan-execute-reflect loops re-read the same data).
+_IDEMPOTENT_MARKERS = ("get_", "list_", "search_", "read_", "describe_", "show_")
+
+_TOOL_CACHE_MAX = 256
+
+_score_docs = None
+
+if np is not None and njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _score_docs(query_ids, doc_ids, doc_offsets, scores):  # pragma: no cover
+        """Count query-token hits per doc. doc_ids is the concatenation of
+        every doc's sorted token ids; doc_offsets delimits each doc's slice."""
+        for d in prange(doc_offsets.shape[0] - 1):
+            start = doc_offsets[d]
+            end   = doc_offsets[d + 1]
+            hits  = 0
+            for qi in range(query_ids.shape[0]):
+                q  = query_ids[qi]
+                lo = start
+                hi = end
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    v = doc_ids[mid]
+                    if v < q:
+                        lo = mid + 1
+                    elif v > q:
+                        hi = mid
+                    else:
+                        hits += 1
+                        break
+            scores[d] = hits
+
+# Marker key for "a complete tool name ends here" in the name trie.
+_TRIE_END = "\0"
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 1.  MCPToolRegistry
 # ─────────────────────────────────────────────────────────────────────────────
@@ -24,17 +114,33 @@ class MCPToolRegistry:
  
     Entry shape:
     {
-        "name":           str,
+        "name":           str,    # qualified: server prefix + "_" + mcp_name
+        "mcp_name":       str,    # the name the MCP server registered
         "description":    str,
         "input_schema":   dict,
         "server_name":    str,
         "started_client": Any,    # ← the live client from cl.start()
+        "schema_str":     str,    # input_schema pre-dumped as indented JSON
+        "find_block":     str,    # pre-formatted find_tool result tail
     }
+
+    Token sets live in the parallel `_doc_tokens` list (same index as
+    `_tools`) so the search machinery never has to touch these dicts.
     """
  
     def __init__(self):
         self._tools: list[dict] = []
-        self._index: dict[str, dict] = {}
+        self._index: dict[str, int] = {}            # qualified name → index
+        self._postings: dict[str, list[int]] = {}   # token → entry indices
+        self._doc_tokens: list[frozenset[str]] = [] # parallel to _tools
+        self._token_ids: dict[str, int] = {}        # token → int id (numba path)
+        self._id_arrays: tuple | None = None        # (doc_ids, doc_offsets)
+        self._trie: dict = {}                       # nested-dict trie of names
+        self._by_server: dict[str, list[str]] = {}  # server → summary lines
+        self._servers: list[str] = []               # registration order
+        self._servers_set: set[str] = set()
+        self._server_split: re.Pattern | None = None  # built by finalize()
+        self._top_default: list[dict] | None = None   # built by finalize()
  
     def register(self, server_name: str, started_client: Any, mcp_tools: list) -> int:
         """
@@ -47,6 +153,15 @@ class MCPToolRegistry:
                          call_tool_sync() and the live session
         mcp_tools      : list[MCPAgentTool] from started_client.list_tools_sync()
         """
+        if isinstance(self._tools, tuple):   # re-opened after finalize()
+            self._tools = list(self._tools)
+            self._doc_tokens = list(self._doc_tokens)
+            self._postings = {tok: list(idxs) for tok, idxs in self._postings.items()}
+
+        if server_name not in self._servers_set:
+            self._servers_set.add(server_name)
+            self._servers.append(server_name)
+
         count = 0
         for mcp_tool in mcp_tools:
             name      = mcp_tool.tool_name
@@ -57,38 +172,193 @@ class MCPToolRegistry:
             input_schema = raw_schema.get("json", raw_schema)  # unwrap {"json":{...}}
  
             entry = {
-                "name":           server_name.lower() + "_" + name,
+                "name":           sys.intern(server_name.lower() + "_" + name),
+                "mcp_name":       sys.intern(name),
                 "description":    description,
                 "input_schema":   input_schema,
-                "server_name":    server_name,
+                "server_name":    sys.intern(server_name),
                 "started_client": started_client,   # ← live session reference
             }
+            tokens = frozenset(_tokenize(entry["name"] + " " + description))
+            entry["schema_str"] = json.dumps(input_schema, indent=2)
+            # Static tail of this entry's find_tool result block; only the
+            # "[i] name (server: ...)" head depends on the query.
+            entry["find_block"] = (
+                "\n    Description : " + description
+                + "\n    Input schema:\n" + entry["schema_str"] + "\n"
+            )
+            entry["summary_line"] = f"  • {entry['name']}: {description[:100]}"
+            self._by_server.setdefault(server_name, []).append(entry["summary_line"])
+            idx = len(self._tools)
+            self._doc_tokens.append(tokens)
+            for tok in tokens:
+                self._postings.setdefault(tok, []).append(idx)
+            node = self._trie
+            for ch in entry["name"]:
+                node = node.setdefault(ch, {})
+            node[_TRIE_END] = True
+            self._index[entry["name"]] = idx
             self._tools.append(entry)
-            self._index[name] = entry
             count += 1
+        self._id_arrays = None     # invalidate the numba arrays, if built
+        self._server_split = None  # invalidate the qualified-name splitter
+        self._top_default = None   # invalidate the empty-query default
         return count
+
+    def finalize(self) -> None:
+        """Freeze the registry once every server has registered.
+
+        Builds structures that need the complete server list and converts
+        the append-only containers to tuples — smaller, faster to iterate,
+        and read-only, so concurrent readers never observe a resize.
+        Called lazily by the methods that depend on it, or explicitly once
+        all register() calls are done; a later register() thaws them again.
+        """
+        if self._servers:
+            # Longest-first so e.g. "github" wins over a "git" server.
+            prefixes = sorted(
+                (s.lower() for s in self._servers), key=len, reverse=True
+            )
+            self._server_split = re.compile(
+                r"^(" + "|".join(re.escape(p) for p in prefixes) + r")_(.+)$"
+            )
+        self._tools = tuple(self._tools)
+        self._doc_tokens = tuple(self._doc_tokens)
+        self._postings = {tok: tuple(idxs) for tok, idxs in self._postings.items()}
+        self._top_default = list(self._tools[:5])
+
+    def split_qualified_name(self, name: str) -> tuple[str, str] | None:
+        """Split a qualified name like 'jira_get_issue' into
+        ('jira', 'get_issue') with a single union-regex match over all
+        known server prefixes. Returns None if no prefix matches."""
+        if self._server_split is None:
+            self.finalize()
+        if self._server_split is None:   # no servers registered yet
+            return None
+        m = self._server_split.match(name)
+        return (m.group(1), m.group(2)) if m else None
  
     # ── search ────────────────────────────────────────────────────────────
- 
+
+    def _ensure_id_arrays(self) -> tuple:
+        """Build (doc_ids, doc_offsets) int32 arrays for the numba scorer.
+
+        Each token gets a stable int id; every doc becomes a sorted id
+        slice inside one flat array. Rebuilt lazily after registration.
+        """
+        if self._id_arrays is None:
+            ids = self._token_ids
+            offsets = [0]
+            flat: list[int] = []
+            for toks in self._doc_tokens:
+                doc = sorted(ids.setdefault(t, len(ids)) for t in toks)
+                flat.extend(doc)
+                offsets.append(len(flat))
+            self._id_arrays = (
+                np.asarray(flat, dtype=np.int32),
+                np.asarray(offsets, dtype=np.int32),
+            )
+        return self._id_arrays
+
+    def _search_numba(self, words: frozenset, top_k: int) -> list[dict]:
+        doc_ids, doc_offsets = self._ensure_id_arrays()
+        query_ids = np.asarray(
+            sorted(self._token_ids[t] for t in words if t in self._token_ids),
+            dtype=np.int32,
+        )
+        if not query_ids.size:
+            return []
+        scores = np.zeros(len(self._tools), dtype=np.int32)
+        _score_docs(query_ids, doc_ids, doc_offsets, scores)
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx])]
+        return [self._tools[i] for i in idx if scores[i] > 0]
+
     def search(self, query: str, top_k: int = 5) -> list[dict]:
         """Keyword search over name + description. No external deps needed."""
-        words = set(re.findall(r"\w+", query.lower()))
+        # Agent bootstrapping hits the empty-query default; skip tokenizing.
+        if not query or not query.strip():
+            if top_k == 5 and self._top_default is not None:
+                return list(self._top_default)
+            return list(self._tools[:top_k])
+
+        words = frozenset(_tokenize(query))
         if not words:
-            return self._tools[:top_k]
- 
-        scored: list[tuple[float, dict]] = []
-        for entry in self._tools:
-            text  = f"{entry['name']} {entry['description']}".lower()
-            found = words & set(re.findall(r"\w+", text))
-            score = len(found) / len(words)
-            if score > 0:
-                scored.append((score, entry))
- 
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return [e for _, e in scored[:top_k]]
+            return list(self._tools[:top_k])
+
+        if _score_docs is not None and len(self._tools) >= _NUMBA_MIN_DOCS:
+            return self._search_numba(words, top_k)
+
+        # Walk posting lists so only entries sharing at least one query
+        # token are ever touched (vs scanning the whole registry).
+        hits: Counter = Counter()
+        for qtok in words:
+            for i in self._postings.get(qtok, ()):
+                hits[i] += 1
+
+        if not hits:
+            return []
+
+        nwords = len(words)
+        if np is not None:
+            # One float32 per tool + O(N) argpartition beats allocating a
+            # (score, entry) tuple per candidate and heap-selecting.
+            scores = np.zeros(len(self._tools), dtype=np.float32)
+            for i, count in hits.items():
+                scores[i] = count / nwords
+            k = min(top_k, len(scores))
+            if k <= 0:
+                return []
+            idx = np.argpartition(-scores, k - 1)[:k]
+            idx = idx[np.argsort(-scores[idx])]
+            return [self._tools[i] for i in idx if scores[i] > 0]
+
+        scored = [(count / nwords, self._tools[i]) for i, count in hits.items()]
+        return [e for _, e in heapq.nlargest(top_k, scored, key=lambda t: t[0])]
  
     def get(self, name: str) -> dict | None:
-        return self._index.get(name)
+        idx = self._index.get(name)
+        return self._tools[idx] if idx is not None else None
+
+    def suggest(self, name: str, k: int = 3) -> list[dict]:
+        """Find registered names within edit distance 1 of a (typo'd) name.
+
+        Walks the name trie allowing one substitution, insertion, or
+        deletion — O(len(name) × branching) instead of re-scoring the
+        whole registry for what is almost always a near-miss typo.
+        """
+        found: list[str] = []
+        seen: set[str] = set()
+
+        def walk(node: dict, i: int, prefix: str, edited: bool) -> None:
+            if i == len(name):
+                if _TRIE_END in node and prefix not in seen:
+                    seen.add(prefix)
+                    found.append(prefix)
+                if not edited:
+                    for ch, child in node.items():   # one trailing insertion
+                        if ch != _TRIE_END and _TRIE_END in child and prefix + ch not in seen:
+                            seen.add(prefix + ch)
+                            found.append(prefix + ch)
+                return
+            child = node.get(name[i])
+            if child is not None:
+                walk(child, i + 1, prefix + name[i], edited)
+            if edited:
+                return
+            for ch, sub in node.items():
+                if ch == _TRIE_END:
+                    continue
+                if ch != name[i]:
+                    walk(sub, i + 1, prefix + ch, True)   # substitution
+                walk(sub, i, prefix + ch, True)           # insertion
+            walk(node, i + 1, prefix, True)               # deletion
+
+        walk(self._trie, 0, "", False)
+        return [self._tools[self._index[n]] for n in found[:k] if n in self._index]
  
     @property
     def total(self) -> int:
@@ -96,23 +366,14 @@ class MCPToolRegistry:
  
     @property
     def all_tools(self) -> list[dict]:
-        return self._tools
+        return list(self._tools)
  
     def servers(self) -> list[str]:
-        seen: list[str] = []
-        for e in self._tools:
-            if e["server_name"] not in seen:
-                seen.append(e["server_name"])
-        return seen
+        return list(self._servers)
  
     def summary_for_prompt(self) -> str:
-        by_server: dict[str, list[str]] = {}
-        for e in self._tools:
-            by_server.setdefault(e["server_name"], []).append(
-                f"  • {e['name']}: {e['description'][:100]}"
-            )
         lines = ["## Connected MCP Servers\n"]
-        for server, tool_lines in by_server.items():
+        for server, tool_lines in self._by_server.items():
             lines.append(f"### {server}  ({len(tool_lines)} tools)")
             lines.extend(tool_lines)
             lines.append("")
@@ -144,7 +405,32 @@ def _make_tools(registry: MCPToolRegistry):
     Build find_tool and call_tool as closures over a specific registry.
     Created AFTER the registry is populated — no global state, no timing bugs.
     """
- 
+
+    # Agents re-ask the same "find jira issue" query many times per session.
+    # The registry can still grow via a late register(), so the tool count
+    # rides along in the key as a staleness guard: new tools mean a new
+    # total, and stale hits for the old total simply age out of the LRU.
+    @functools.lru_cache(maxsize=256)
+    def _find_cached(q_norm: str, top_k: int, total: int) -> str:
+        results = registry.search(q_norm, top_k=top_k)
+
+        if not results:
+            servers = ", ".join(registry.servers()) or "none"
+            return (
+                f"No tools found matching '{q_norm}'.\n"
+                f"Available servers: {servers}\n"
+                "Try a broader search term."
+            )
+
+        blocks = [
+            f"[{i}] {e['name']}  (server: {e['server_name']}){e['find_block']}"
+            for i, e in enumerate(results, 1)
+        ]
+        return "\n".join(
+            [f"Found {len(results)} tool(s) matching '{q_norm}':\n"] + blocks
+        )
+
+
     @strands_tool
     def find_tool(query: str, top_k: int = 5) -> str:
         """Search for MCP tools relevant to the current task.
@@ -165,27 +451,16 @@ def _make_tools(registry: MCPToolRegistry):
         query = query.strip()
         if not query:
             return "ERROR: query cannot be empty."
- 
-        results = registry.search(query, top_k=int(top_k))
- 
-        if not results:
-            servers = ", ".join(registry.servers()) or "none"
-            return (
-                f"No tools found matching '{query}'.\n"
-                f"Available servers: {servers}\n"
-                "Try a broader search term."
-            )
- 
-        lines = [f"Found {len(results)} tool(s) matching '{query}':\n"]
-        for i, entry in enumerate(results, 1):
-            schema_str = json.dumps(entry["input_schema"], indent=2)
-            lines.append(
-                f"[{i}] {entry['name']}  (server: {entry['server_name']})\n"
-                f"    Description : {entry['description']}\n"
-                f"    Input schema:\n{schema_str}\n"
-            )
-        return "\n".join(lines)
- 
+
+        return _find_cached(query.lower(), int(top_k), registry.total)
+
+    # Session-scoped result cache for read-only tools, keyed by
+    # (tool_name, canonical JSON args). LRU via OrderedDict move-to-end.
+    _tool_cache: OrderedDict = OrderedDict()
+
+    def _is_idempotent(tool_name: str) -> bool:
+        return any(marker in tool_name for marker in _IDEMPOTENT_MARKERS)
+
     @strands_tool
     def call_tool(tool_name: str, arguments: str) -> str:
         """Execute a specific MCP tool by its exact name.
@@ -213,7 +488,11 @@ def _make_tools(registry: MCPToolRegistry):
         else:
             args_str = (arguments or "{}").strip()
             try:
-                args = json.loads(args_str)
+                # Memoize small payloads — retries resend identical args.
+                if len(args_str) < 1024:
+                    args = _parse_args(args_str)
+                else:
+                    args = _loads(args_str)
             except json.JSONDecodeError as exc:
                 return (
                     f"ERROR: arguments must be a valid JSON string.\n"
@@ -225,7 +504,7 @@ def _make_tools(registry: MCPToolRegistry):
         # ── Look up tool ──────────────────────────────────────────────────
         entry = registry.get(tool_name)
         if entry is None:
-            similar = registry.search(tool_name, top_k=3)
+            similar = registry.suggest(tool_name, 3) or registry.search(tool_name, top_k=3)
             suggestions = ", ".join(e["name"] for e in similar) if similar else "none found"
             return (
                 f"ERROR: Tool '{tool_name}' not found in registry.\n"
@@ -233,6 +512,21 @@ def _make_tools(registry: MCPToolRegistry):
                 "Use find_tool to search for the correct tool name."
             )
  
+        # ── Idempotent-tool result cache ──────────────────────────────────
+        cache_key = None
+        if _is_idempotent(tool_name):
+            try:
+                cache_key = (tool_name, json.dumps(args, sort_keys=True))
+            except TypeError:
+                # args arrived as a dict with non-JSON values — let the
+                # server decide what to do with them, just skip caching.
+                cache_key = None
+            if cache_key is not None:
+                cached = _tool_cache.get(cache_key)
+                if cached is not None:
+                    _tool_cache.move_to_end(cache_key)
+                    return cached
+
         # ── Invoke via the live started_client ────────────────────────────
         # We use the started_client (from cl.start()) directly — this is the
         # same object whose session stays alive after your startup code runs.
@@ -243,12 +537,14 @@ def _make_tools(registry: MCPToolRegistry):
         #
         # Result shape: {"toolUseId": ..., "status": ..., "content": [{"text": ...}]}
         client = entry["started_client"]
-        tool_use_id = f"optimizer-{uuid.uuid4().hex[:8]}"
+        tool_use_id = "optimizer-" + os.urandom(4).hex()
  
         try:
+            # The RPC wants the name the server registered, not our
+            # server-prefixed qualified name.
             result = client.call_tool_sync(
                 tool_use_id=tool_use_id,
-                name=tool_name,
+                name=entry["mcp_name"],
                 arguments=args,
             )
         except Exception as exc:
@@ -263,20 +559,46 @@ def _make_tools(registry: MCPToolRegistry):
             status         = result.get("status", "success")
             content_blocks = result.get("content", [])
  
+            # Blocks in one response usually share a type — branch once, not
+            # per block. A mixed response falls back to the per-block check:
+            # the dict path raises AttributeError on an object block, and
+            # the object path must scan for dicts since getattr on a dict
+            # silently returns the default instead of raising.
             text_parts: list[str] = []
-            for block in content_blocks:
-                if isinstance(block, dict):
-                    text = block.get("text", "")
-                else:
-                    text = getattr(block, "text", "")
-                if text:
-                    text_parts.append(str(text))
+            mixed = False
+            if content_blocks:
+                try:
+                    if isinstance(content_blocks[0], dict):
+                        texts = (b.get("text", "") for b in content_blocks)
+                        text_parts = [str(t) for t in texts if t]
+                    elif any(isinstance(b, dict) for b in content_blocks):
+                        mixed = True
+                    else:
+                        texts = (getattr(b, "text", "") for b in content_blocks)
+                        text_parts = [str(t) for t in texts if t]
+                except (AttributeError, TypeError):
+                    mixed = True
+                if mixed:
+                    text_parts = []
+                    for block in content_blocks:
+                        if isinstance(block, dict):
+                            text = block.get("text", "")
+                        else:
+                            text = getattr(block, "text", "")
+                        if text:
+                            text_parts.append(str(text))
  
             output = "\n".join(text_parts) if text_parts else str(result)
  
             if status == "error":
                 return f"Tool '{tool_name}' returned an error:\n{output}"
-            return output or "(Tool returned an empty result)"
+
+            output = output or "(Tool returned an empty result)"
+            if cache_key is not None:
+                _tool_cache[cache_key] = output
+                if len(_tool_cache) > _TOOL_CACHE_MAX:
+                    _tool_cache.popitem(last=False)
+            return output
  
         # Fallback for unexpected result shapes
         return str(result) if result else "(Tool returned an empty result)"